@@ -1,62 +1,119 @@
 from fastapi import Request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Optional
+import asyncio
 import hashlib
 import os
+import threading
+import time
+
+import jwt
+from cachetools import TTLCache
 
 from orbmem.utils.exceptions import AuthError
 from orbmem.core.config import load_config
-from orbmem.db.api_keys import get_api_key_record
+from orbmem.db.api_keys import (
+    get_api_key_record,
+    hash_api_key,
+    legacy_hash_api_key,
+    on_api_key_change,
+)
 
+# Resolved once at import; mode never changes for a running process
+CONFIG = load_config()
+_LOCAL_MODE = CONFIG.api.mode == "local"
 
-# =================================================
-# FIREBASE (ENV BASED, SAFE)
-# =================================================
+# Shared, read-only auth context for every local-mode request
+_LOCAL_AUTH_CTX = MappingProxyType({
+    "mode": "local",
+    "is_unlimited": True,
+})
 
-_firebase_initialized = False
 
+# =================================================
+# FIREBASE (OFFLINE JWT VERIFICATION)
+# =================================================
 
-def _init_firebase():
-    global _firebase_initialized
-    if _firebase_initialized:
-        return
-
-    try:
-        import firebase_admin
-        from firebase_admin import credentials
+# Google's public signing keys for Firebase ID tokens
+FIREBASE_JWKS_URL = (
+    "https://www.googleapis.com/service_accounts/v1/jwk/"
+    "securetoken@system.gserviceaccount.com"
+)
 
-        project_id = os.getenv("FIREBASE_PROJECT_ID")
-        private_key = os.getenv("FIREBASE_PRIVATE_KEY")
-        client_email = os.getenv("FIREBASE_CLIENT_EMAIL")
+# Read once at import (load_config() above has already applied .env)
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+_FIREBASE_ISSUER = f"https://securetoken.google.com/{FIREBASE_PROJECT_ID}"
 
-        if not project_id or not private_key or not client_email:
-            raise AuthError("Firebase ENV variables not configured")
+_jwks_client = None
+_jwks_lock = threading.Lock()
 
-        cred = credentials.Certificate({
-            "type": "service_account",
-            "project_id": project_id,
-            "private_key": private_key.replace("\\n", "\n"),
-            "client_email": client_email,
-            "token_uri": "https://oauth2.googleapis.com/token",
-        })
+# Verified token claims, keyed by a short digest of the token.
+# Never served past the token's own exp.
+_token_cache = TTLCache(maxsize=50000, ttl=55)
+_token_cache_lock = threading.Lock()
 
-        firebase_admin.initialize_app(cred)
-        _firebase_initialized = True
 
-    except Exception as e:
-        raise AuthError(f"Firebase init failed: {e}")
+def _get_jwks_client() -> jwt.PyJWKClient:
+    """
+    Process-wide JWKS client.
+    Keys are cached for an hour and refetched on an unknown `kid`.
+    """
+    global _jwks_client
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                _jwks_client = jwt.PyJWKClient(
+                    FIREBASE_JWKS_URL,
+                    cache_keys=True,
+                    lifespan=3600,
+                )
+    return _jwks_client
 
 
 def _verify_firebase_token(id_token: str) -> dict:
     """
-    Verifies Firebase ID token and returns user dict
+    Verifies Firebase ID token offline against Google's cached
+    public keys and returns the decoded claims (with "uid").
     """
+    token_key = hashlib.blake2b(id_token.encode(), digest_size=16).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(token_key)
+    if cached is not None and time.time() < cached["exp"]:
+        return dict(cached)
+
+    if not FIREBASE_PROJECT_ID:
+        raise AuthError("Firebase ENV variables not configured")
+
     try:
-        _init_firebase()
-        from firebase_admin import auth
-        return auth.verify_id_token(id_token)
+        signing_key = _get_jwks_client().get_signing_key_from_jwt(id_token)
+        claims = jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=FIREBASE_PROJECT_ID,
+            issuer=_FIREBASE_ISSUER,
+            options={"require": ["exp", "iat", "sub"]},
+        )
     except Exception:
         raise AuthError("Invalid Firebase token")
 
+    # Same extra claim checks the Firebase Admin SDK applied
+    sub = claims["sub"]
+    if not isinstance(sub, str) or not sub or len(sub) > 128:
+        raise AuthError("Invalid Firebase token")
+
+    auth_time = claims.get("auth_time")
+    if auth_time is not None and auth_time > time.time():
+        raise AuthError("Invalid Firebase token")
+
+    claims["uid"] = claims["sub"]
+
+    with _token_cache_lock:
+        _token_cache[token_key] = dict(claims)
+    return claims
+
 
 # =================================================
 # API KEY HELPERS
@@ -65,41 +122,99 @@ def _verify_firebase_token(id_token: str) -> dict:
 API_KEY_PREFIX = "orbynt-"
 
 
-def _hash_api_key(raw_key: str) -> str:
-    return hashlib.sha256(raw_key.encode()).hexdigest()
-
-
 def _validate_api_key_format(key: str):
     if not key.startswith(API_KEY_PREFIX):
         raise AuthError("Invalid API key prefix")
 
 
+# =================================================
+# AUTH CACHE
+# =================================================
+
+# Validated (firebase token, API key) pairs -> auth context.
+# Entries live at most AUTH_CACHE_TTL seconds past the key record's
+# fetch time and never past the token / key expiry, so a revocation
+# from another process propagates within one TTL (local rotations
+# clear the cache immediately).
+AUTH_CACHE_TTL = 60
+
+_auth_cache = TTLCache(maxsize=10000, ttl=AUTH_CACHE_TTL)
+_auth_cache_lock = threading.Lock()
+
+
+def _auth_cache_key(firebase_token: str, raw_api_key: Optional[str]) -> bytes:
+    # Distinct prefixes keep firebase-only entries apart from API-key ones
+    if raw_api_key is None:
+        return hashlib.sha256(b"f|" + firebase_token.encode()).digest()
+    return hashlib.sha256(
+        b"k|" + firebase_token.encode() + b"|" + raw_api_key.encode()
+    ).digest()
+
+
+def _auth_cache_get(key: bytes) -> Optional[dict]:
+    with _auth_cache_lock:
+        entry = _auth_cache.get(key)
+
+    if entry is None:
+        return None
+
+    auth_ctx, deadline = entry
+    if deadline is not None and time.time() >= deadline:
+        return None
+
+    return dict(auth_ctx)
+
+
+def _auth_cache_put(key: bytes, auth_ctx: dict, deadline: Optional[float]):
+    with _auth_cache_lock:
+        _auth_cache[key] = (dict(auth_ctx), deadline)
+
+
+def clear_auth_cache(uid: Optional[str] = None):
+    """
+    Drops cached auth contexts (all, or just one uid's).
+    Runs automatically whenever create_api_key changes a user's keys.
+    """
+    with _auth_cache_lock:
+        if uid is None:
+            _auth_cache.clear()
+            return
+
+        stale = [k for k, (ctx, _) in _auth_cache.items() if ctx["uid"] == uid]
+        for k in stale:
+            _auth_cache.pop(k, None)
+
+
+on_api_key_change(clear_auth_cache)
+
+
 # =================================================
 # MAIN AUTH ENTRY
 # =================================================
 
-def validate_request(request: Request) -> dict:
+def validate_request(request: Request, *, require_api_key: bool = True) -> dict:
     """
     LOCAL MODE:
         - No auth required
 
     CLOUD MODE:
         - Firebase token required (X-Firebase-Token)
-        - API key required (Authorization: Bearer <API_KEY>)
+        - API key required (Authorization: Bearer <API_KEY>),
+          unless require_api_key=False (account / payment endpoints)
     """
 
-    cfg = load_config()
-
     # ---------------------------
     # LOCAL MODE
     # ---------------------------
-    if cfg.api.mode == "local":
-        auth_ctx = {
-            "mode": "local",
-            "is_unlimited": True,
-        }
-        request.state.auth = auth_ctx
-        return auth_ctx
+    if _LOCAL_MODE:
+        request.state.auth = _LOCAL_AUTH_CTX
+        return _LOCAL_AUTH_CTX
+
+    # ---------------------------
+    # FIREBASE ONLY
+    # ---------------------------
+    if not require_api_key:
+        return _validate_firebase_only(request)
 
     # ---------------------------
     # HEADERS
@@ -115,6 +230,15 @@ def validate_request(request: Request) -> dict:
 
     raw_api_key = api_auth.replace("Bearer ", "").strip()
 
+    # Cheap prefix check before any hashing, token or DB work
+    _validate_api_key_format(raw_api_key)
+
+    cache_key = _auth_cache_key(firebase_token, raw_api_key)
+    cached = _auth_cache_get(cache_key)
+    if cached is not None:
+        request.state.auth = cached
+        return cached
+
     # ---------------------------
     # VERIFY FIREBASE
     # ---------------------------
@@ -124,10 +248,10 @@ def validate_request(request: Request) -> dict:
     # ---------------------------
     # VERIFY API KEY
     # ---------------------------
-    _validate_api_key_format(raw_api_key)
-    api_key_hash = _hash_api_key(raw_api_key)
-
-    record = get_api_key_record(api_key_hash)
+    record = get_api_key_record(
+        hash_api_key(raw_api_key),
+        legacy_hash_api_key(raw_api_key),
+    )
 
     if not record:
         raise AuthError("Invalid API key")
@@ -138,11 +262,23 @@ def validate_request(request: Request) -> dict:
     if not record["is_active"]:
         raise AuthError("API key is disabled")
 
+    deadline = user.get("exp")
+
+    # The record may already have sat in the record cache; don't let
+    # this entry extend its staleness by another full TTL
+    fetched_at = record.get("fetched_at")
+    if fetched_at is not None:
+        record_deadline = fetched_at + AUTH_CACHE_TTL
+        deadline = record_deadline if deadline is None else min(deadline, record_deadline)
+
     if not record["is_unlimited"] and record["expires_at"]:
         now = datetime.now(timezone.utc)
         if record["expires_at"] < now:
             raise AuthError("API key expired")
 
+        key_deadline = record["expires_at"].timestamp()
+        deadline = key_deadline if deadline is None else min(deadline, key_deadline)
+
     # ---------------------------
     # AUTH CONTEXT
     # ---------------------------
@@ -154,5 +290,55 @@ def validate_request(request: Request) -> dict:
         "is_unlimited": record["is_unlimited"],
     }
 
+    _auth_cache_put(cache_key, auth_ctx, deadline)
+
+    request.state.auth = auth_ctx
+    return auth_ctx
+
+
+# Dedicated pool so auth never competes with the framework's
+# default threadpool used by sync endpoints
+_AUTH_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="orbmem-auth")
+
+
+async def validate_request_async(request: Request, *, require_api_key: bool = True) -> dict:
+    """
+    validate_request() for async handlers.
+    Runs token verification and the key lookup on _AUTH_POOL
+    so the event loop is never blocked.
+    """
+    if _LOCAL_MODE:
+        request.state.auth = _LOCAL_AUTH_CTX
+        return _LOCAL_AUTH_CTX
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _AUTH_POOL,
+        lambda: validate_request(request, require_api_key=require_api_key),
+    )
+
+
+def _validate_firebase_only(request: Request) -> dict:
+    firebase_token = request.headers.get("X-Firebase-Token")
+
+    if not firebase_token:
+        raise AuthError("Missing X-Firebase-Token")
+
+    cache_key = _auth_cache_key(firebase_token, None)
+    cached = _auth_cache_get(cache_key)
+    if cached is not None:
+        request.state.auth = cached
+        return cached
+
+    user = _verify_firebase_token(firebase_token)
+
+    auth_ctx = {
+        "mode": "cloud",
+        "uid": user["uid"],
+        "email": user.get("email"),
+    }
+
+    _auth_cache_put(cache_key, auth_ctx, user.get("exp"))
+
     request.state.auth = auth_ctx
-    return auth_ctx
\ No newline at end of file
+    return auth_ctx
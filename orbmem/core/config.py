@@ -4,6 +4,9 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from orbmem.utils.exceptions import ConfigError
+from orbmem.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 # ===========================
@@ -23,6 +26,7 @@ class APIConfig:
     mode: str
     debug: bool
     owner_uid: Optional[str]
+    api_key_pepper: Optional[str] = None
 
 
 @dataclass
@@ -56,7 +60,22 @@ def _get_env(name: str, default=None, required=False):
 # MAIN CONFIG
 # ===========================
 
-def load_config() -> OCDBConfig:
+_CACHED: Optional[OCDBConfig] = None
+
+# Example values that must never reach a cloud deployment
+_PLACEHOLDER_PEPPERS = ("change-me", "changeme")
+
+
+def load_config(force_reload: bool = False) -> OCDBConfig:
+    """
+    Returns the process-wide config.
+    .env and the environment are read on first call only;
+    pass force_reload=True to re-read them.
+    """
+    global _CACHED
+    if _CACHED is not None and not force_reload:
+        return _CACHED
+
     load_dotenv(override=True)
 
     # MODE
@@ -77,8 +96,14 @@ def load_config() -> OCDBConfig:
         mode=mode,
         debug=_get_env("OCDB_DEBUG", "0") in ("1", "true", "yes"),
         owner_uid=_get_env("OCDB_OWNER_UID"),
+        api_key_pepper=_get_env("OCDB_API_KEY_PEPPER"),
     )
 
+    # Without a real secret, stored key hashes are plain BLAKE2b and
+    # can be brute-forced offline
+    if mode == "cloud" and api_cfg.api_key_pepper in (None, *_PLACEHOLDER_PEPPERS):
+        raise ConfigError("OCDB_API_KEY_PEPPER must be set to a secret in cloud mode")
+
     # RAZORPAY
     key_id = _get_env("RAZORPAY_KEY_ID")
     key_secret = _get_env("RAZORPAY_KEY_SECRET")
@@ -94,12 +119,13 @@ def load_config() -> OCDBConfig:
     elif key_id or key_secret:
         raise ConfigError("Razorpay partially configured")
 
-    print(f"🔧 OCDB_MODE: {mode}")
-    print(f"🗄  Postgres configured: {bool(db_cfg.postgres_url)}")
-    print(f"💳 Razorpay enabled: {bool(razorpay_cfg)}")
+    logger.info(f"OCDB_MODE: {mode}")
+    logger.info(f"Postgres configured: {bool(db_cfg.postgres_url)}")
+    logger.info(f"Razorpay enabled: {bool(razorpay_cfg)}")
 
-    return OCDBConfig(
+    _CACHED = OCDBConfig(
         db=db_cfg,
         api=api_cfg,
         razorpay=razorpay_cfg,
-    )
\ No newline at end of file
+    )
+    return _CACHED
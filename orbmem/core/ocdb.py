@@ -1,6 +1,6 @@
 # core/ocdb.py
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import os
 
 from orbmem.core.config import load_config
@@ -9,7 +9,7 @@ from orbmem.core.config import load_config
 from orbmem.engines.memory.postgres_backend import PostgresMemoryBackend
 
 # VECTOR ENGINE (FAISS-based)
-from orbmem.engines.vector.FAISS_backend import QdrantVectorBackend
+from orbmem.engines.vector.faiss_backend import QdrantVectorBackend
 
 # GRAPH ENGINE
 from orbmem.engines.graph.neo4j_backend import Neo4jGraphBackend
@@ -81,6 +81,19 @@ class OCDB:
         ttl_seconds=ttl_seconds,
      )
 
+    def memory_set_many(
+      self,
+      items: List[Tuple[str, dict]],
+      session_id: Optional[str] = None,
+      ttl_seconds: Optional[int] = None,
+    ):
+      return self.memory.set_many(
+        items,
+        user_id=self.uid,
+        session_id=session_id,
+        ttl_seconds=ttl_seconds,
+     )
+
     def memory_get(self, key: str):
      return self.memory.get(
        key,
@@ -101,12 +114,12 @@ class OCDB:
         payload["user_id"] = self.uid
         self.vector_engine.add_text(text, payload)
 
+    def vector_add_many(self, texts: List[str], payloads: List[dict]):
+        payloads = [dict(p, user_id=self.uid) for p in payloads]
+        self.vector_engine.add_texts(texts, payloads)
+
     def vector_search(self, query: str, k: int = 5):
-        results = self.vector_engine.search(query, k=k)
-        return [
-            r for r in results
-            if r.get("payload", {}).get("user_id") == self.uid
-        ]
+        return self.vector_engine.search(query, k=k, user_id=self.uid)
 
     # =====================================================
     # GRAPH
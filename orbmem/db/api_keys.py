@@ -1,37 +1,162 @@
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict
+from typing import Callable, Dict, List, Optional
 import secrets
 import hashlib
+import threading
+import time
 
-from orbmem.db.postgres import SessionLocal
+from cachetools import TTLCache
+
+from orbmem.core.config import load_config
+from orbmem.db.postgres import session_scope
 from orbmem.utils.exceptions import DatabaseError, AuthError
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
 
 API_KEY_PREFIX = "orbynt-"
 
+CONFIG = load_config()
+
+# Secret key for BLAKE2b key hashes, normalised to BLAKE2b's 64-byte key
+# size. Changing OCDB_API_KEY_PEPPER invalidates keys hashed with it;
+# load_config() refuses to start cloud mode without a real one.
+_PEPPER = (
+    hashlib.blake2b(CONFIG.api.api_key_pepper.encode()).digest()
+    if CONFIG.api.api_key_pepper else b""
+)
+
+# Key records by hash. Keys change rarely; local writes clear the cache
+# and writes from other processes show up within RECORD_CACHE_TTL.
+# Each record carries "fetched_at" so callers caching data derived
+# from it can stay within the same window.
+RECORD_CACHE_TTL = 60
+
+# Unknown hashes are cached apart from real records, so a flood of bad
+# keys can only evict other misses, never a valid key's record
+MISS_CACHE_SIZE = 1024
+
+_record_cache = TTLCache(maxsize=10000, ttl=RECORD_CACHE_TTL)
+_miss_cache = TTLCache(maxsize=MISS_CACHE_SIZE, ttl=RECORD_CACHE_TTL)
+_record_cache_lock = threading.RLock()
+
+# Called with a user_id whenever that user's keys change, so modules
+# that cache data derived from key records (core/auth.py) can drop it.
+# A registry avoids importing those modules from here.
+_key_change_hooks: List[Callable[[str], None]] = []
+
 
 # -------------------------------------------------
 # INTERNAL HELPERS
 # -------------------------------------------------
 
-def _hash_key(raw_key: str) -> str:
+def hash_api_key(raw_key: str) -> str:
+    """Keyed BLAKE2b-256 hash stored for new API keys."""
+    return hashlib.blake2b(
+        raw_key.encode(), digest_size=32, key=_PEPPER
+    ).hexdigest()
+
+
+def legacy_hash_api_key(raw_key: str) -> str:
+    """SHA-256 hash of keys issued before the BLAKE2b switch."""
     return hashlib.sha256(raw_key.encode()).hexdigest()
 
 
+def clear_api_key_cache():
+    """Drops all cached API key records."""
+    with _record_cache_lock:
+        _record_cache.clear()
+        _miss_cache.clear()
+
+
+def on_api_key_change(hook: Callable[[str], None]):
+    """Registers hook(user_id) to run after a user's keys change."""
+    _key_change_hooks.append(hook)
+    return hook
+
+
+def _invalidate_user_keys(user_id: str):
+    clear_api_key_cache()
+    for hook in _key_change_hooks:
+        hook(user_id)
+
+
+# session.info key holding user_ids to invalidate when that session commits
+_PENDING_INVALIDATIONS = "orbmem_pending_key_invalidations"
+
+
+def _on_session_commit(session: Session):
+    for user_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        _invalidate_user_keys(user_id)
+
+
+def _on_session_rollback(session: Session):
+    # Rolled back: nothing changed, so nothing to invalidate
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+def _invalidate_after_commit(session: Session, user_id: str):
+    """
+    Defers cache invalidation until the caller's transaction commits;
+    clearing earlier would let a concurrent lookup re-cache the
+    pre-commit rows. The two listeners are added once per session and
+    only act on user_ids queued in session.info, so reused sessions
+    and rollbacks leave nothing behind.
+    """
+    pending = session.info.get(_PENDING_INVALIDATIONS)
+    if pending is None:
+        pending = session.info[_PENDING_INVALIDATIONS] = set()
+    pending.add(user_id)
+
+    if not event.contains(session, "after_commit", _on_session_commit):
+        event.listen(session, "after_commit", _on_session_commit)
+        event.listen(session, "after_rollback", _on_session_rollback)
+
+
 def generate_api_key() -> tuple[str, str]:
     """
     Generates a raw API key and its hash.
     """
     token = secrets.token_urlsafe(32)
     raw_key = f"{API_KEY_PREFIX}{token}"
-    return raw_key, _hash_key(raw_key)
+    return raw_key, hash_api_key(raw_key)
 
 
 # -------------------------------------------------
 # CREATE API KEY
 # -------------------------------------------------
 
-from sqlalchemy import text   # you already imported this ✅
+_INSERT_KEY_BODY = """
+    INSERT INTO api_keys (
+        user_id,
+        api_key_hash,
+        is_active,
+        is_unlimited,
+        expires_at,
+        plan
+    )
+    VALUES (
+        :user_id,
+        :hash,
+        TRUE,
+        :is_unlimited,
+        :expires_at,
+        :plan
+    )
+"""
+
+_INSERT_KEY_SQL = text(_INSERT_KEY_BODY)
+
+# Disables the user's current keys and inserts the new one in a single
+# round-trip. The UPDATE runs against the pre-INSERT snapshot, so the
+# new key is never revoked.
+_ROTATE_KEY_SQL = text("""
+    WITH revoked AS (
+        UPDATE api_keys
+        SET is_active = FALSE
+        WHERE user_id = :user_id AND is_active = TRUE
+    )
+""" + _INSERT_KEY_BODY)
+
 
 def create_api_key(
     *,
@@ -39,9 +164,16 @@ def create_api_key(
     plan: str,
     is_unlimited: bool = False,
     duration_days: Optional[int] = None,
+    revoke_existing: bool = False,
+    session: Optional[Session] = None,
 ) -> str:
     """
     Creates a new API key for a user.
+    With revoke_existing=True the user's active keys are disabled
+    in the same statement (key regeneration / plan purchase).
+    Pass the caller's session to join its transaction; the caller
+    then owns commit / rollback, and caches are invalidated once
+    that session commits.
     Returns RAW key (shown only once).
     """
 
@@ -51,83 +183,85 @@ def create_api_key(
     if not is_unlimited and duration_days:
         expires_at = datetime.now(timezone.utc) + timedelta(days=duration_days)
 
-    db = SessionLocal()
+    sql = _ROTATE_KEY_SQL if revoke_existing else _INSERT_KEY_SQL
+
+    params = {
+        "user_id": user_id,
+        "hash": key_hash,
+        "is_unlimited": is_unlimited,
+        "expires_at": expires_at,
+        "plan": plan,
+    }
+
     try:
-        db.execute(
-            text("""
-                INSERT INTO api_keys (
-                    user_id,
-                    api_key_hash,
-                    is_active,
-                    is_unlimited,
-                    expires_at,
-                    plan
-                )
-                VALUES (
-                    :user_id,
-                    :hash,
-                    TRUE,
-                    :is_unlimited,
-                    :expires_at,
-                    :plan
-                )
-            """),
-            {
-                "user_id": user_id,
-                "hash": key_hash,
-                "is_unlimited": is_unlimited,
-                "expires_at": expires_at,
-                "plan": plan,
-            }
-        )
-        db.commit()
+        if session is not None:
+            session.execute(sql, params)
+            _invalidate_after_commit(session, user_id)
+        else:
+            with session_scope() as db:
+                db.execute(sql, params)
+            _invalidate_user_keys(user_id)
         return raw_key
 
     except Exception as e:
-        db.rollback()
         raise DatabaseError(f"API key creation failed: {e}")
 
-    finally:
-        db.close()
-
 # -------------------------------------------------
 # LOOKUP API KEY (YOUR ORIGINAL LOGIC)
 # -------------------------------------------------
 
-def get_api_key_record(api_key_hash: str) -> Optional[Dict]:
+_LOOKUP_KEY_SQL = text("""
+    SELECT id, user_id, is_active, is_unlimited, expires_at
+    FROM api_keys
+    WHERE api_key_hash IN (:hash, :legacy_hash)
+    LIMIT 1
+""")
+
+
+def get_api_key_record(
+    api_key_hash: str,
+    legacy_hash: Optional[str] = None,
+) -> Optional[Dict]:
     """
     Fetch API key record by hash.
+    Pass legacy_hash to also match keys stored with SHA-256.
     Returns dict or None.
     """
-    db = SessionLocal()
+    with _record_cache_lock:
+        cached = _record_cache.get(api_key_hash)
+        if cached is None and api_key_hash in _miss_cache:
+            return None
+    if cached is not None:
+        return cached
+
     try:
-        result = db.execute(
-          text("""
-            SELECT id, user_id, is_active, is_unlimited, expires_at
-            FROM api_keys
-            WHERE api_key_hash = :hash
-            LIMIT 1
-          """),
-           {"hash": api_key_hash}
-        ).fetchone()
+        with session_scope() as db:
+            result = db.execute(
+                _LOOKUP_KEY_SQL,
+                {"hash": api_key_hash, "legacy_hash": legacy_hash}
+            ).fetchone()
 
         if not result:
+            with _record_cache_lock:
+                _miss_cache[api_key_hash] = True
             return None
 
-        return {
+        record = {
             "id": result[0],
             "user_id": result[1],
             "is_active": result[2],
             "is_unlimited": result[3],
             "expires_at": result[4],
+            "fetched_at": time.time(),
         }
 
+        with _record_cache_lock:
+            _record_cache[api_key_hash] = record
+        return record
+
     except Exception as e:
         raise DatabaseError(f"API key lookup failed: {e}")
 
-    finally:
-        db.close()
-
 
 # -------------------------------------------------
 # VERIFY API KEY
@@ -144,8 +278,10 @@ def verify_api_key(raw_key: str) -> Dict:
     if not raw_key.startswith(API_KEY_PREFIX):
         raise AuthError("Invalid API key prefix")
 
-    key_hash = _hash_key(raw_key)
-    record = get_api_key_record(key_hash)
+    record = get_api_key_record(
+        hash_api_key(raw_key),
+        legacy_hash_api_key(raw_key),
+    )
 
     if not record:
         raise AuthError("Invalid API key")
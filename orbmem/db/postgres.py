@@ -2,6 +2,8 @@
 
 # db/postgres.py
 
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from orbmem.core.config import load_config
@@ -19,8 +21,11 @@ try:
     engine = create_engine(
         POSTGRES_URL,
         echo=False,
-        pool_pre_ping=True,   # auto-detect dead connections
-        pool_recycle=1800      # refresh stale connections
+        pool_size=10,          # persistent connections kept open
+        max_overflow=20,       # extra connections under burst load
+        pool_timeout=30,       # seconds to wait for a free connection
+        pool_pre_ping=True,    # auto-detect dead connections
+        pool_recycle=3600      # refresh stale connections
     )
     logger.info("PostgreSQL engine initialized successfully.")
 except Exception as e:
@@ -36,3 +41,25 @@ SessionLocal = sessionmaker(
 
 # Base class for all SQLAlchemy ORM models
 Base = declarative_base()
+
+
+def get_db():
+    """
+    Yields a session and owns its lifecycle:
+    commit on success, rollback on error, always close.
+
+    Usable directly as a FastAPI dependency: Depends(get_db)
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# Same lifecycle for plain `with` blocks
+session_scope = contextmanager(get_db)
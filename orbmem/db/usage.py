@@ -1,38 +1,139 @@
 # orbmem/db/usage.py
 
+import atexit
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timezone
-from orbmem.db.postgres import SessionLocal
+from typing import Dict
+
+from sqlalchemy import text
+from orbmem.db.postgres import session_scope
+from orbmem.utils.logger import get_logger
 from orbmem.utils.exceptions import DatabaseError
 
+logger = get_logger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 5
+FLUSH_MAX_EVENTS = 1000   # flush early once this many increments are buffered
+FLUSH_RETRY_MAX_SECONDS = 60   # backoff cap after failed flushes
+
+_UPSERT_USAGE_SQL = """
+    INSERT INTO api_usage (api_key_id, count, window_start)
+    VALUES {rows}
+    ON CONFLICT (api_key_id)
+    DO UPDATE SET count = api_usage.count + EXCLUDED.count
+"""
+
+_pending: Dict[str, int] = defaultdict(int)
+_pending_events = 0
+_pending_lock = threading.Lock()
+_flush_now = threading.Event()
+_flusher = None
+
 
 def increment_usage(api_key_id: str):
     """
     Track API usage per API key.
     Unlimited plans are NOT blocked.
     This is tracking only.
+
+    Counts are buffered in memory and written by flush_usage(),
+    which a background thread runs every FLUSH_INTERVAL_SECONDS
+    or as soon as FLUSH_MAX_EVENTS increments are pending.
     """
-    db = SessionLocal()
+    global _pending_events
+    with _pending_lock:
+        _pending[api_key_id] += 1
+        _pending_events += 1
+        full = _pending_events >= FLUSH_MAX_EVENTS
+
+    _ensure_flusher()
+    if full:
+        _flush_now.set()
+
+
+def flush_usage():
+    """
+    Write all buffered usage counts to Postgres
+    as a single multi-row UPSERT.
+    Counts are kept for the next flush if the write fails, but
+    don't count toward FLUSH_MAX_EVENTS again, so an outage can't
+    turn every increment into an immediate retry.
+    """
+    global _pending_events
+    with _pending_lock:
+        if not _pending:
+            return
+        batch = dict(_pending)
+        _pending.clear()
+        _pending_events = 0
+
     try:
-        now = datetime.now(timezone.utc)
-
-        db.execute(
-            """
-            INSERT INTO api_usage (api_key_id, count, window_start)
-            VALUES (:api_key_id, 1, :now)
-            ON CONFLICT (api_key_id)
-            DO UPDATE SET count = api_usage.count + 1
-            """,
-            {
-                "api_key_id": api_key_id,
-                "now": now,
-            },
-        )
+        params = {"now": datetime.now(timezone.utc)}
+        rows = []
+        for i, (key_id, delta) in enumerate(batch.items()):
+            params[f"k{i}"] = key_id
+            params[f"d{i}"] = delta
+            rows.append(f"(:k{i}, :d{i}, :now)")
 
-        db.commit()
+        with session_scope() as db:
+            db.execute(
+                text(_UPSERT_USAGE_SQL.format(rows=", ".join(rows))),
+                params,
+            )
 
     except Exception as e:
-        db.rollback()
+        with _pending_lock:
+            for key_id, delta in batch.items():
+                _pending[key_id] += delta
         raise DatabaseError(f"Usage tracking failed: {e}")
 
-    finally:
-        db.close()
\ No newline at end of file
+
+# -------------------------------------------------
+# BACKGROUND FLUSHER
+# -------------------------------------------------
+
+def _flush_loop():
+    backoff = 0
+    while True:
+        if backoff:
+            # Early-flush requests are ignored while the DB is failing
+            time.sleep(backoff)
+        else:
+            _flush_now.wait(FLUSH_INTERVAL_SECONDS)
+        _flush_now.clear()
+
+        try:
+            flush_usage()
+            backoff = 0
+        except DatabaseError as e:
+            backoff = min(
+                FLUSH_RETRY_MAX_SECONDS,
+                max(FLUSH_INTERVAL_SECONDS, backoff * 2),
+            )
+            logger.error(f"{e} (retrying in {backoff}s)")
+
+
+def _flush_at_exit():
+    try:
+        flush_usage()
+    except DatabaseError as e:
+        logger.error(str(e))
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+
+    with _pending_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_loop,
+            name="orbmem-usage-flush",
+            daemon=True,
+        )
+        _flusher.start()
+        atexit.register(_flush_at_exit)
@@ -3,8 +3,12 @@
 
 import json
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Optional, List
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional, Tuple
+
+import orjson
 
 from orbmem.utils.logger import get_logger
 from orbmem.utils.exceptions import DatabaseError
@@ -13,59 +17,213 @@ logger = get_logger(__name__)
 
 DB_PATH = "ocdb.sqlite3"
 
+# Expired rows are purged at most this often; reads filter them inline
+CLEANUP_INTERVAL_SECONDS = 60
+
+# Applied to every new per-thread connection. WAL lets readers run
+# alongside a writer; synchronous=NORMAL skips the per-commit fsync
+# (a crash can lose the last commits, never corrupt the file).
+_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+"""
+
+_init_lock = threading.Lock()
+
+# How long a starting process keeps retrying while another holds the
+# write lock (e.g. running the expires_at migration on a large table)
+INIT_LOCK_TIMEOUT_SECONDS = 300
+
+
+def _retry_on_busy(fn):
+    deadline = time.monotonic() + INIT_LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            busy = "locked" in str(e) or "busy" in str(e)
+            if not busy or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+# value holds orjson bytes, or stdlib JSON TEXT for rows orjson can't
+# encode (and rows written before the switch); expires_at is unix
+# epoch seconds
+_MEMORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS memory (
+        user_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB,
+        session_id TEXT,
+        expires_at INTEGER,
+        PRIMARY KEY (user_id, key)
+    )
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO memory (user_id, key, value, session_id, expires_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, key) DO UPDATE SET
+        value=excluded.value,
+        session_id=excluded.session_id,
+        expires_at=excluded.expires_at
+"""
+
+_GET_SQL = """
+    SELECT value FROM memory
+    WHERE user_id = ? AND key = ?
+      AND (expires_at IS NULL OR expires_at > ?)
+"""
+
+_KEYS_SQL = """
+    SELECT key FROM memory
+    WHERE user_id = ?
+      AND (expires_at IS NULL OR expires_at > ?)
+"""
+
+_DELETE_SQL = "DELETE FROM memory WHERE user_id = ? AND key = ?"
+
+_CLEANUP_SQL = (
+    "DELETE FROM memory WHERE expires_at IS NOT NULL AND expires_at < ?"
+)
+
+# Statements are module constants, so every call hits the
+# connection's prepared-statement cache
+_CACHED_STATEMENTS = 256
+
+# json.dumps accepted non-str dict keys; keep that working
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _encode_value(value):
+    """
+    orjson bytes, falling back to json.dumps TEXT for values orjson
+    rejects (e.g. ints beyond 64 bits). The storage type tells
+    _decode_value which parser to use. NaN / Infinity follow orjson
+    and are stored as null.
+    """
+    try:
+        return orjson.dumps(value, option=_DUMPS_OPTIONS)
+    except orjson.JSONEncodeError:
+        return json.dumps(value)
+
+
+def _decode_value(raw):
+    if isinstance(raw, str):
+        return json.loads(raw)
+    return orjson.loads(raw)
+
 
 class PostgresMemoryBackend:
     """
     Tenant-safe SQLite memory backend.
     """
 
-    def _init_(self):
-        self._connect()
+    _last_cleanup_ts = 0.0
+
+    # One sqlite3 connection per thread, opened on first use
+    _local = threading.local()
+    _tables_ready = False
+
+    def __init__(self):
+        self._get_conn()
 
     # ---------------------------------------------------------
-    # CONNECT / RECONNECT (CRITICAL FIX)
+    # CONNECT (PER THREAD)
     # ---------------------------------------------------------
-    def _connect(self):
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
         try:
-            self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            self.cursor = self.conn.cursor()
-            self._init_tables()
-            logger.info("Memory backend initialized (SQLite, tenant-safe).")
+            # Autocommit; multi-statement work uses explicit BEGIN / COMMIT
+            conn = sqlite3.connect(
+                DB_PATH,
+                isolation_level=None,
+                cached_statements=_CACHED_STATEMENTS,
+            )
+            _retry_on_busy(lambda: conn.executescript(_CONNECTION_PRAGMAS))
+
+            if not PostgresMemoryBackend._tables_ready:
+                with _init_lock:
+                    if not PostgresMemoryBackend._tables_ready:
+                        _retry_on_busy(lambda: self._init_tables(conn))
+                        PostgresMemoryBackend._tables_ready = True
+                        logger.info("Memory backend initialized (SQLite, tenant-safe).")
         except Exception as e:
             raise DatabaseError(f"SQLite init error: {e}")
 
-    def _ensure_connection(self):
-        if not hasattr(self, "cursor") or self.cursor is None:
-            logger.warning("Memory backend cursor missing, reconnecting...")
-            self._connect()
+        self._local.conn = conn
+        return conn
 
     # ---------------------------------------------------------
     # INIT TABLES
     # ---------------------------------------------------------
-    def _init_tables(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS memory (
-                user_id TEXT NOT NULL,
-                key TEXT NOT NULL,
-                value TEXT,
-                session_id TEXT,
-                expires_at TEXT,
-                PRIMARY KEY (user_id, key)
-            )
+    def _init_tables(self, conn: sqlite3.Connection):
+        # One write transaction, so concurrently starting processes
+        # serialize here and only the first one ever migrates
+        with self._write_txn(conn):
+            conn.execute(_MEMORY_TABLE_SQL)
+            self._migrate_expires_at(conn)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_memory_expires
+                ON memory(expires_at) WHERE expires_at IS NOT NULL
+            """)
+
+    def _migrate_expires_at(self, conn: sqlite3.Connection):
+        """
+        Older databases stored expires_at as ISO-8601 TEXT.
+        Rebuild the table once with INTEGER epoch seconds.
+        Must run inside the _init_tables write transaction.
+        """
+        columns = {
+            row[1]: row[2]
+            for row in conn.execute("PRAGMA table_info(memory)")
+        }
+        if columns.get("expires_at", "").upper() == "INTEGER":
+            return
+
+        logger.info("Migrating memory.expires_at to INTEGER epoch seconds...")
+        conn.execute("DROP INDEX IF EXISTS idx_memory_expires")
+        conn.execute("ALTER TABLE memory RENAME TO memory_v1")
+        conn.execute(_MEMORY_TABLE_SQL)
+        conn.execute("""
+            INSERT INTO memory (user_id, key, value, session_id, expires_at)
+                SELECT user_id, key, value, session_id,
+                       CAST(strftime('%s', expires_at) AS INTEGER)
+                FROM memory_v1
         """)
-        self.conn.commit()
+        conn.execute("DROP TABLE memory_v1")
+
+    # ---------------------------------------------------------
+    # WRITE TRANSACTION
+    # ---------------------------------------------------------
+    @contextmanager
+    def _write_txn(self, conn: sqlite3.Connection):
+        """
+        One IMMEDIATE transaction (write lock taken up front, no
+        read->write upgrade) so cleanup + upsert share a single commit.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
 
     # ---------------------------------------------------------
     # CLEAN EXPIRED
     # ---------------------------------------------------------
-    def _cleanup_expired(self):
-        self._ensure_connection()
-        now = datetime.utcnow().isoformat()
-        self.cursor.execute(
-            "DELETE FROM memory WHERE expires_at IS NOT NULL AND expires_at < ?",
-            (now,)
-        )
-        self.conn.commit()
+    def _cleanup_expired(self, conn: sqlite3.Connection):
+        if time.time() - self._last_cleanup_ts < CLEANUP_INTERVAL_SECONDS:
+            return
+        self._last_cleanup_ts = time.time()
+
+        conn.execute(_CLEANUP_SQL, (int(time.time()),))
 
     # ---------------------------------------------------------
     # SET
@@ -80,52 +238,83 @@ class PostgresMemoryBackend:
         ttl_seconds: Optional[int] = None,
     ):
         try:
-            self._ensure_connection()
-            self._cleanup_expired()
+            conn = self._get_conn()
 
             expires_at = None
             if ttl_seconds:
-                expires_at = (
-                    datetime.utcnow() + timedelta(seconds=ttl_seconds)
-                ).isoformat()
-
-            value_json = json.dumps(value)
-
-            self.cursor.execute("""
-                INSERT INTO memory (user_id, key, value, session_id, expires_at)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, key) DO UPDATE SET
-                    value=excluded.value,
-                    session_id=excluded.session_id,
-                    expires_at=excluded.expires_at
-            """, (
-                user_id,
-                key,
-                value_json,
-                session_id,
-                expires_at
-            ))
-
-            self.conn.commit()
+                expires_at = int(time.time()) + ttl_seconds
+
+            encoded = _encode_value(value)
+
+            with self._write_txn(conn):
+                self._cleanup_expired(conn)
+                conn.execute(_UPSERT_SQL, (
+                    user_id,
+                    key,
+                    encoded,
+                    session_id,
+                    expires_at
+                ))
 
         except Exception as e:
             raise DatabaseError(f"Memory set error: {e}")
 
+    # ---------------------------------------------------------
+    # SET MANY
+    # ---------------------------------------------------------
+    def set_many(
+        self,
+        items: List[Tuple[str, Any]],
+        *,
+        user_id: str,
+        session_id: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+    ):
+        """
+        Writes (key, value) pairs in a single transaction.
+        All items share session_id and ttl_seconds.
+        """
+        if not items:
+            return
+
+        try:
+            conn = self._get_conn()
+
+            expires_at = None
+            if ttl_seconds:
+                expires_at = int(time.time()) + ttl_seconds
+
+            rows = [
+                (
+                    user_id,
+                    key,
+                    _encode_value(value),
+                    session_id,
+                    expires_at,
+                )
+                for key, value in items
+            ]
+
+            with self._write_txn(conn):
+                self._cleanup_expired(conn)
+                conn.executemany(_UPSERT_SQL, rows)
+
+        except Exception as e:
+            raise DatabaseError(f"Memory set_many error: {e}")
+
     # ---------------------------------------------------------
     # GET
     # ---------------------------------------------------------
     def get(self, key: str, *, user_id: str):
         try:
-            self._ensure_connection()
-            self._cleanup_expired()
+            conn = self._get_conn()
+            self._cleanup_expired(conn)
 
-            self.cursor.execute(
-                "SELECT value FROM memory WHERE user_id = ? AND key = ?",
-                (user_id, key)
-            )
+            row = conn.execute(
+                _GET_SQL, (user_id, key, int(time.time()))
+            ).fetchone()
 
-            row = self.cursor.fetchone()
-            return json.loads(row[0]) if row else None
+            return _decode_value(row[0]) if row else None
 
         except Exception as e:
             raise DatabaseError(f"Memory get error: {e}")
@@ -135,14 +324,13 @@ class PostgresMemoryBackend:
     # ---------------------------------------------------------
     def keys(self, *, user_id: str) -> List[str]:
         try:
-            self._ensure_connection()
-            self._cleanup_expired()
+            conn = self._get_conn()
+            self._cleanup_expired(conn)
 
-            self.cursor.execute(
-                "SELECT key FROM memory WHERE user_id = ?",
-                (user_id,)
-            )
-            return [r[0] for r in self.cursor.fetchall()]
+            rows = conn.execute(
+                _KEYS_SQL, (user_id, int(time.time()))
+            ).fetchall()
+            return [r[0] for r in rows]
 
         except Exception as e:
             raise DatabaseError(f"Memory keys error: {e}")
@@ -152,11 +340,7 @@ class PostgresMemoryBackend:
     # ---------------------------------------------------------
     def delete(self, key: str, *, user_id: str):
         try:
-            self._ensure_connection()
-            self.cursor.execute(
-                "DELETE FROM memory WHERE user_id = ? AND key = ?",
-                (user_id, key)
-            )
-            self.conn.commit()
+            conn = self._get_conn()
+            conn.execute(_DELETE_SQL, (user_id, key))
         except Exception as e:
             raise DatabaseError(f"Memory delete error: {e}")
\ No newline at end of file
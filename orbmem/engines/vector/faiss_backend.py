@@ -0,0 +1,362 @@
+# orbmem/engines/vector/faiss_backend.py
+
+import hashlib
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Searches here are single queries (nq=1); OpenMP's default spin-wait
+# burns cores between them. Only read at OpenMP start-up, so it must be
+# set before faiss is imported; an explicit env value still wins.
+os.environ.setdefault("OMP_WAIT_POLICY", "PASSIVE")
+
+try:
+    import faiss
+except ImportError as e:
+    raise ImportError(
+        "FAISS is required for vector search.\n"
+        "Install it using: pip install faiss-cpu"
+    ) from e
+
+from orbmem.utils.exceptions import DatabaseError, ValidationError
+
+try:
+    from orbmem.utils.embeddings import EMBEDDING_DIM, embed_texts
+except ImportError:
+    # sentence-transformers not installed -> text-seeded random fallback
+    EMBEDDING_DIM, embed_texts = None, None
+
+
+# From this many IVF cells on, centroid assignment goes through an
+# HNSW graph instead of a brute-force scan over all centroids
+HNSW_QUANTIZER_MIN_NLIST = 4096
+
+# add_texts embeds and indexes large inputs in pages of this many rows,
+# bounding the temporary float32 matrix to ~ADD_PAGE_SIZE * dim * 4 bytes
+ADD_PAGE_SIZE = 65536
+
+
+def _text_seed(text: str) -> int:
+    # Stable across processes, unlike hash() under PYTHONHASHSEED
+    return int.from_bytes(
+        hashlib.blake2b(text.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def _ivf_prefix(n_vectors: int, hnsw: Optional[bool]) -> str:
+    nlist = max(1, int(4 * math.sqrt(n_vectors)))
+
+    if hnsw is None:
+        hnsw = nlist >= HNSW_QUANTIZER_MIN_NLIST
+    quantizer = "_HNSW32" if hnsw else ""
+
+    return f"IVF{nlist}{quantizer}"
+
+
+def ivfpq_factory(dim: int, n_vectors: int, hnsw: Optional[bool] = None) -> str:
+    """
+    index_factory string for an IVF-PQ index sized for ~n_vectors:
+    nlist = 4*sqrt(N) Voronoi cells, M ~ dim/8 one-byte PQ codes.
+    hnsw=None picks an HNSW32 coarse quantizer for large nlist.
+    Training needs at least max(nlist, 256) vectors.
+    """
+    m = max(1, dim // 8)
+    while dim % m:
+        m -= 1
+
+    return f"{_ivf_prefix(n_vectors, hnsw)},PQ{m}x8"
+
+
+def ivfsq_factory(dim: int, n_vectors: int, hnsw: Optional[bool] = None) -> str:
+    """
+    index_factory string for an IVF index with 8-bit scalar quantization
+    (1 byte per dimension, 4x smaller than float32). Without AVX2 the
+    int8 distance kernels are slower than float, so fp16 is used instead.
+    """
+    codec = "SQ8" if "AVX2" in faiss.get_compile_options() else "SQfp16"
+    return f"{_ivf_prefix(n_vectors, hnsw)},{codec}"
+
+
+@dataclass(slots=True)
+class Payload:
+    """
+    Compact per-vector metadata: the payload's values as a tuple, plus
+    its key tuple, which is interned and shared by every payload with
+    the same keys. Values are stored as given.
+    """
+    keys: tuple
+    values: tuple
+
+    @classmethod
+    def from_dict(cls, payload: dict, schemas: Dict[tuple, tuple]) -> "Payload":
+        keys = tuple(payload)
+        return cls(
+            keys=schemas.setdefault(keys, keys),
+            values=tuple(payload.values()),
+        )
+
+    def to_dict(self) -> dict:
+        return dict(zip(self.keys, self.values))
+
+
+class QdrantVectorBackend:
+    """
+    FAISS-based in-memory vector store.
+    Per-process, shared across users (user_id selectors isolate users).
+
+    Defaults to an exact Flat index. For large collections pass e.g.
+    index_factory=ivfpq_factory(dim, expected_n) (or ivfsq_factory)
+    and call train() before adding.
+    """
+
+    def __init__(self, dim: int = 384, index_factory: str = "Flat"):
+        self.dim = dim
+        # Vectors are unit-length, so inner product ranks like cosine / L2
+        self.index = faiss.index_factory(
+            dim, index_factory, faiss.METRIC_INNER_PRODUCT
+        )
+
+        # Store metadata separately
+        self._payloads: List[Payload] = []
+        # One shared key tuple per distinct payload key set
+        self._schemas: Dict[tuple, tuple] = {}
+
+        # Owner of each FAISS id as a dense int32 column (-1 = no user),
+        # for in-index filtering. _user_code[:ntotal] is live; the rest
+        # is spare capacity.
+        self._user_dict: Dict[str, int] = {}
+        self._user_code = np.empty(0, dtype=np.int32)
+        self._has_unowned = False
+        self._nprobe: Optional[int] = None
+
+        # (params, selector) per user code, built on first search and
+        # dropped when that user adds vectors or nprobe changes
+        self._selectors: Dict[int, tuple] = {}
+
+        # Real embeddings when the model is installed and matches dim
+        self._embedder = embed_texts if EMBEDDING_DIM == dim else None
+
+    # --------------------------------------------------
+    # INTERNAL
+    # --------------------------------------------------
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds texts into a (B, dim) float32 C-contiguous array
+        of L2-normalized rows.
+        Falls back to a VERY simple deterministic embedding
+        when no embedding model is available.
+        """
+        if self._embedder is not None:
+            out = np.array(self._embedder(texts), dtype=np.float32, order="C")
+        else:
+            out = np.empty((len(texts), self.dim), dtype=np.float32)
+            for i, text in enumerate(texts):
+                rng = np.random.default_rng(_text_seed(text))
+                rng.random(dtype=np.float32, out=out[i])
+
+        faiss.normalize_L2(out)
+        return out
+
+    def _reserve_user_codes(self, capacity: int, n_live: int):
+        if capacity <= len(self._user_code):
+            return
+        grown = np.empty(capacity, dtype=np.int32)
+        grown[:n_live] = self._user_code[:n_live]
+        self._user_code = grown
+
+    def _user_codes_for(self, payloads: List[dict]) -> np.ndarray:
+        return np.fromiter(
+            (
+                -1 if p.get("user_id") is None
+                else self._user_dict.setdefault(p["user_id"], len(self._user_dict))
+                for p in payloads
+            ),
+            dtype=np.int32,
+            count=len(payloads),
+        )
+
+    def _store_user_codes(self, first_id: int, codes: np.ndarray):
+        end = first_id + len(codes)
+        if end > len(self._user_code):
+            # Grow geometrically so repeated small adds stay amortized O(1)
+            self._reserve_user_codes(
+                max(end, 2 * len(self._user_code)), first_id
+            )
+
+        self._user_code[first_id:end] = codes
+
+        for code in np.unique(codes).tolist():
+            if code == -1:
+                self._has_unowned = True
+            else:
+                self._selectors.pop(code, None)
+
+    # --------------------------------------------------
+    # TRAINING / TUNING (IVF indexes)
+    # --------------------------------------------------
+
+    def train(self, sample: np.ndarray):
+        """
+        Trains the index on representative (N, dim) vectors.
+        No-op for indexes that need no training (Flat).
+        """
+        if self.index.is_trained:
+            return
+
+        self.index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+        ivf = faiss.extract_index_ivf(self.index)
+        self.set_nprobe(max(1, ivf.nlist // 64))
+
+        if isinstance(faiss.downcast_index(ivf.quantizer), faiss.IndexHNSW):
+            self.set_ef_search(64)
+
+    def train_texts(self, texts: List[str]):
+        self.train(self._embed_batch(texts))
+
+    def set_nprobe(self, nprobe: int):
+        """
+        Number of IVF cells scanned per query (speed / recall knob).
+        """
+        faiss.ParameterSpace().set_index_parameter(self.index, "nprobe", nprobe)
+        self._nprobe = nprobe
+        self._selectors.clear()
+
+    @staticmethod
+    def set_threads(n: int):
+        """
+        OpenMP threads FAISS uses (process-wide). 1 is usually fastest
+        for single-query search; raise it for train() and bulk adds.
+        MKL-backed faiss builds scale better here than OpenBLAS ones.
+        """
+        faiss.omp_set_num_threads(n)
+
+    def set_ef_search(self, ef: int):
+        """
+        HNSW coarse-quantizer search depth (IVF..._HNSW indexes only).
+        """
+        faiss.ParameterSpace().set_index_parameter(
+            self.index, "quantizer_efSearch", ef
+        )
+
+    # --------------------------------------------------
+    # PUBLIC API (required by BaseEngine)
+    # --------------------------------------------------
+
+    def add_text(self, text: str, payload: dict):
+        self.add_texts([text], [payload])
+
+    def preallocate(self, n: int):
+        """
+        Reserves bookkeeping for n total vectors ahead of a large ingest.
+        FAISS code storage has no reserve() in the Python bindings, so
+        that still grows on add; paging in add_texts bounds the rest.
+        """
+        self._reserve_user_codes(n, self.index.ntotal)
+
+    def add_texts(self, texts: List[str], payloads: List[dict]):
+        """
+        Embeds and indexes a batch with one model call and one FAISS
+        add per ADD_PAGE_SIZE texts.
+        """
+        self._check_batch(len(texts), len(payloads))
+        if not texts:
+            return
+
+        for start in range(0, len(texts), ADD_PAGE_SIZE):
+            end = start + ADD_PAGE_SIZE
+            self._add_normalized(
+                self._embed_batch(texts[start:end]), payloads[start:end]
+            )
+
+    def add_batch(self, vectors: np.ndarray, payloads: List[dict]):
+        """
+        Indexes precomputed (B, dim) embeddings with a single FAISS add.
+        Rows are L2-normalized on a copy; the caller's array is untouched.
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValidationError(
+                f"vectors must have shape (B, {self.dim}), got {vectors.shape}"
+            )
+        self._check_batch(len(vectors), len(payloads))
+        if not len(vectors):
+            return
+
+        vectors = np.array(vectors, dtype=np.float32, order="C")
+        faiss.normalize_L2(vectors)
+        self._add_normalized(vectors, payloads)
+
+    def _check_batch(self, n_items: int, n_payloads: int):
+        if n_items != n_payloads:
+            raise ValidationError("payloads must have one entry per text / vector")
+        if n_items and not self.index.is_trained:
+            raise DatabaseError("Vector index is not trained; call train() first")
+
+    def _add_normalized(self, vectors: np.ndarray, payloads: List[dict]):
+        # Everything that can fail on bad payloads runs before the add,
+        # so the index never gets ahead of _payloads / _user_code
+        stored = [Payload.from_dict(p, self._schemas) for p in payloads]
+        codes = self._user_codes_for(payloads)
+
+        first_id = self.index.ntotal
+        self.index.add(vectors)
+        self._payloads.extend(stored)
+        self._store_user_codes(first_id, codes)
+
+    def _search_params(self, code: int):
+        """
+        Search parameters restricting FAISS to one user's vectors,
+        or None when that user owns the whole index (no filter needed).
+        """
+        if len(self._user_dict) == 1 and not self._has_unowned:
+            return None
+
+        cached = self._selectors.get(code)
+        if cached is not None:
+            return cached[0]
+
+        ids = np.flatnonzero(self._user_code[:self.index.ntotal] == code)
+        sel = faiss.IDSelectorBatch(ids.astype(np.int64, copy=False))
+        if self._nprobe is not None:
+            params = faiss.SearchParametersIVF(sel=sel, nprobe=self._nprobe)
+        else:
+            params = faiss.SearchParameters(sel=sel)
+
+        # Keep sel alive alongside params; params only holds a raw pointer
+        self._selectors[code] = (params, sel)
+        return params
+
+    def search(self, query: str, k: int = 5, user_id: Optional[str] = None):
+        """
+        Top-k search. With user_id, only that user's vectors are
+        considered (filtered inside FAISS, not after the fact).
+        """
+        if self.index.ntotal == 0:
+            return []
+
+        params = None
+        if user_id is not None:
+            code = self._user_dict.get(user_id)
+            if code is None:
+                return []
+            params = self._search_params(code)
+
+        query_vec = self._embed_batch([query])
+
+        distances, indices = self.index.search(query_vec, k, params=params)
+
+        results = []
+        for score, idx in zip(distances[0], indices[0]):
+            if idx == -1:
+                continue
+            results.append({
+                "score": float(score),   # cosine similarity, higher is closer
+                "payload": self._payloads[idx].to_dict(),
+            })
+
+        return results
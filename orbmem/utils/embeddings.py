@@ -1,12 +1,15 @@
 # utils/embeddings.py
 
 from functools import lru_cache
+from typing import List
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from orbmem.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+EMBEDDING_DIM = 384
+
 
 @lru_cache(maxsize=1)
 def get_embedding_model():
@@ -25,10 +28,20 @@ def embed_text(text: str):
     Returns a Python list of floats (JSON serializable).
     """
     if not text or not isinstance(text, str):
-        return [0.0] * 384
+        return [0.0] * EMBEDDING_DIM
 
     model = get_embedding_model()
     vector = model.encode(text)
 
     # Convert NumPy array → list so Qdrant can store it
     return vector.astype(float).tolist()
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Convert a batch of texts into a (B, 384) float32 array
+    with a single model call.
+    """
+    model = get_embedding_model()
+    vectors = model.encode(texts, convert_to_numpy=True)
+    return np.ascontiguousarray(vectors, dtype=np.float32)